@@ -3,37 +3,135 @@ FastAPI backend for SpeakWell - Portuguese pronunciation learning app.
 Uses ElevenLabs Speech-to-Text API to transcribe audio and evaluate pronunciation.
 """
 
+import hashlib
 import json
 import os
-from io import BytesIO
-from typing import List, Optional
+import re
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, BinaryIO, List, Optional, Tuple
+import httpx
+import orjson
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, Form, UploadFile, HTTPException
+from fastapi import FastAPI, File, Form, Request, Response, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from pydantic import BaseModel
 from elevenlabs.client import ElevenLabs
+from elevenlabs.environment import ElevenLabsEnvironment
 
 # Load environment variables
 load_dotenv()
 
+def warm_up_elevenlabs(http_client: httpx.Client) -> None:
+    """Open a pooled connection to ElevenLabs so the first transcription skips the TLS handshake."""
+    try:
+        http_client.head(ElevenLabsEnvironment.PRODUCTION.value, timeout=5.0)
+    except Exception:
+        pass  # Warm-up is best effort; the first request will connect instead
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the ElevenLabs client for this app run and release its connections on shutdown."""
+    # Long-lived HTTP/2 connection pool so transcriptions reuse warm TLS connections
+    http_client = httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+        timeout=60.0,
+        follow_redirects=True,
+    )
+    app.state.elevenlabs = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"), httpx_client=http_client)
+    await run_in_threadpool(warm_up_elevenlabs, http_client)
+    try:
+        yield
+    finally:
+        http_client.close()
+
+
+class TranscribeUploadLimitMiddleware:
+    """
+    Bound /transcribe request bodies before the multipart form is parsed.
+    Declared sizes are checked up front; chunked or unsized bodies are counted as they stream in.
+    Other paths pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int) -> None:
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] != "/transcribe":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_body_size:
+            response = ORJSONResponse(status_code=413, content={"detail": "Audio file too large"})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # FastAPI re-raises HTTPExceptions from body parsing as-is
+                    raise HTTPException(status_code=413, detail="Audio file too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
 # Initialize FastAPI app
-app = FastAPI(title="SpeakWell API", description="Portuguese pronunciation learning backend")
+app = FastAPI(
+    title="SpeakWell API",
+    description="Portuguese pronunciation learning backend",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+# Largest accepted audio upload (a few minutes of compressed speech)
+MAX_AUDIO_BYTES = 5 * 1024 * 1024
+# Allowance for the multipart boundaries and form fields around the audio
+MAX_TRANSCRIBE_REQUEST_BYTES = MAX_AUDIO_BYTES + 64 * 1024
+
+
+# Registered before CORS so rejections still carry CORS headers
+app.add_middleware(TranscribeUploadLimitMiddleware, max_body_size=MAX_TRANSCRIBE_REQUEST_BYTES)
 
 # Enable CORS for frontend communication
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:3000"],  # Vite default ports
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Accept", "Content-Type", "If-None-Match"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
-# Initialize ElevenLabs client
-elevenlabs = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+# Compress JSON responses; phrase lists and word evaluations repeat the same keys
+app.add_middleware(GZipMiddleware, minimum_size=256, compresslevel=5)
 
 # Data directory for phrase categories
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 
+# Matches punctuation (anything except word characters, whitespace and apostrophes)
+_PUNCT_RE = re.compile(r"[^\w\s']")
+
+# Bounded LRU cache of transcription results keyed by (audio digest, expected phrase)
+TRANSCRIPTION_CACHE_SIZE = 256
+transcription_cache: "OrderedDict[Tuple[bytes, str], dict]" = OrderedDict()
+
+# Category and phrase data only change on deploy, so clients may cache them and revalidate by ETag
+DATA_CACHE_CONTROL = "public, max-age=3600, immutable"
+
 
 # Pydantic Models
 class WordEvaluation(BaseModel):
@@ -74,30 +172,90 @@ def load_json_file(filename: str) -> list:
         return []
 
 
+# Phrase lookup tables keyed by category ID, then phrase ID (data files are static)
+PHRASES_BY_ID = {
+    category["id"]: {phrase["id"]: phrase for phrase in load_json_file(f"{category['id']}.json")}
+    for category in load_json_file("categories.json")
+}
+
+
+def build_cached_payload(data: Any) -> Tuple[bytes, str]:
+    """Serialize data to JSON once and derive an ETag from the encoded body.
+
+    The ETag is weak because GZipMiddleware may serve the same body with a different encoding.
+    """
+    body = orjson.dumps(data)
+    return body, f'W/"{hashlib.md5(body).hexdigest()}"'
+
+
+# Pre-serialized category and phrase responses, built once at import
+CATEGORIES_PAYLOAD = build_cached_payload(load_json_file("categories.json"))
+PHRASES_PAYLOADS = {
+    category_id: build_cached_payload(list(phrases.values()))
+    for category_id, phrases in PHRASES_BY_ID.items()
+    if phrases
+}
+PHRASE_PAYLOADS = {
+    category_id: {phrase_id: build_cached_payload(phrase) for phrase_id, phrase in phrases.items()}
+    for category_id, phrases in PHRASES_BY_ID.items()
+}
+
+
+def cached_json_response(request: Request, payload: Tuple[bytes, str]) -> Response:
+    """Return a pre-serialized JSON payload, or 304 if the client already has it."""
+    body, etag = payload
+    headers = {"ETag": etag, "Cache-Control": DATA_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match", "")
+    # If-None-Match uses weak comparison, so ignore the W/ prefix on both sides;
+    # "*" matches any current representation
+    client_tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in client_tags or etag.removeprefix("W/") in client_tags:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def hash_audio(file: BinaryIO) -> bytes:
+    """Hash an uploaded audio file in chunks and rewind it for the next reader."""
+    digest = hashlib.blake2b(digest_size=16)
+    file.seek(0)
+    for chunk in iter(lambda: file.read(64 * 1024), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.digest()
+
+
 def normalize_text(text: str) -> str:
     """Normalize text for comparison by lowercasing and removing punctuation."""
-    import re
-    # Convert to lowercase
-    text = text.lower()
-    # Remove punctuation except apostrophes
-    text = re.sub(r"[^\w\s']", "", text)
-    # Remove extra whitespace
-    text = " ".join(text.split())
-    return text
+    # Lowercase, remove punctuation except apostrophes, collapse whitespace
+    return " ".join(_PUNCT_RE.sub("", text.lower()).split())
+
+
+# Normalized words of every known phrase; the frontend sends these phrases verbatim
+EXPECTED_WORDS = {
+    phrase["phrase"]: tuple(normalize_text(phrase["phrase"]).split())
+    for phrases in PHRASES_BY_ID.values()
+    for phrase in phrases.values()
+}
 
 
 def evaluate_words(transcribed: str, expected: str) -> List[WordEvaluation]:
     """
     Compare transcribed words against expected words.
     Returns a list of word evaluations with correctness status.
+    Models are built with model_construct since every field is produced locally.
     """
-    # Normalize both texts
-    transcribed_normalized = normalize_text(transcribed)
-    expected_normalized = normalize_text(expected)
+    # Normalize both texts and split into words (known phrases are precomputed)
+    transcribed_words = tuple(normalize_text(transcribed).split())
+    expected_words = EXPECTED_WORDS.get(expected)
+    if expected_words is None:
+        expected_words = tuple(normalize_text(expected).split())
+    
+    # An exact match is the common success case: every word is correct
+    if transcribed_words == expected_words:
+        return [WordEvaluation.model_construct(word=expected_word, correct=True) for expected_word in expected_words]
     
-    # Split into words
-    transcribed_words = transcribed_normalized.split()
-    expected_words = expected_normalized.split()
+    # Transcribed words only need membership checks
+    transcribed_set = frozenset(transcribed_words)
     
     evaluations = []
     
@@ -105,8 +263,8 @@ def evaluate_words(transcribed: str, expected: str) -> List[WordEvaluation]:
     # This is a simple approach - we check if the expected word exists anywhere in transcription
     for expected_word in expected_words:
         # Check if this word appears in the transcribed words (exact match)
-        is_correct = expected_word in transcribed_words
-        evaluations.append(WordEvaluation(word=expected_word, correct=is_correct))
+        is_correct = expected_word in transcribed_set
+        evaluations.append(WordEvaluation.model_construct(word=expected_word, correct=is_correct))
     
     return evaluations
 
@@ -117,49 +275,48 @@ async def root():
     return {"message": "SpeakWell API is running", "status": "healthy"}
 
 
-@app.get("/categories", response_model=List[Category])
-async def get_categories():
+@app.get("/categories", responses={200: {"model": List[Category]}})
+async def get_categories(request: Request):
     """Get all available phrase categories."""
-    return load_json_file("categories.json")
+    return cached_json_response(request, CATEGORIES_PAYLOAD)
 
 
-@app.get("/categories/{category_id}/phrases", response_model=List[Phrase])
-async def get_phrases_by_category(category_id: str):
+@app.get("/categories/{category_id}/phrases", responses={200: {"model": List[Phrase]}})
+async def get_phrases_by_category(category_id: str, request: Request):
     """Get all phrases for a specific category."""
-    categories = load_json_file("categories.json")
-    if not any(category["id"] == category_id for category in categories):
+    if category_id not in PHRASES_BY_ID:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    phrases = load_json_file(f"{category_id}.json")
-    if not phrases:
+    payload = PHRASES_PAYLOADS.get(category_id)
+    if payload is None:
         raise HTTPException(status_code=404, detail="No phrases found for category")
 
-    return phrases
+    return cached_json_response(request, payload)
 
 
-@app.get("/phrases", response_model=List[Phrase])
-async def get_phrases(category: Optional[str] = None):
+@app.get("/phrases", responses={200: {"model": List[Phrase]}})
+async def get_phrases(request: Request, category: Optional[str] = None):
     """Get phrases for a category (defaults to greetings)."""
     category_id = category or "greetings"
-    phrases = load_json_file(f"{category_id}.json")
-    if not phrases:
+    payload = PHRASES_PAYLOADS.get(category_id)
+    if payload is None:
         raise HTTPException(status_code=404, detail="No phrases found for category")
-    return phrases
+    return cached_json_response(request, payload)
 
 
-@app.get("/phrases/{phrase_id}", response_model=Phrase)
-async def get_phrase(phrase_id: int, category: Optional[str] = None):
+@app.get("/phrases/{phrase_id}", responses={200: {"model": Phrase}})
+async def get_phrase(phrase_id: int, request: Request, category: Optional[str] = None):
     """Get a specific phrase by ID within a category."""
     category_id = category or "greetings"
-    phrases = load_json_file(f"{category_id}.json")
-    for phrase in phrases:
-        if phrase["id"] == phrase_id:
-            return phrase
-    raise HTTPException(status_code=404, detail="Phrase not found")
+    payload = PHRASE_PAYLOADS.get(category_id, {}).get(phrase_id)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Phrase not found")
+    return cached_json_response(request, payload)
 
 
-@app.post("/transcribe", response_model=TranscriptionResponse)
+@app.post("/transcribe", responses={200: {"model": TranscriptionResponse}})
 async def transcribe_audio(
+    request: Request,
     audio: UploadFile = File(..., description="Audio file containing Portuguese speech"),
     expected_phrase: str = Form(..., description="The expected Portuguese phrase to compare against"),
     category: Optional[str] = Form(None, description="Optional category ID for context")
@@ -172,15 +329,26 @@ async def transcribe_audio(
     
     Returns word-level evaluation showing which words were pronounced correctly.
     """
+    # The request limit includes the form envelope; also bound the audio part itself
+    if audio.size is not None and audio.size > MAX_AUDIO_BYTES:
+        raise HTTPException(status_code=413, detail="Audio file too large")
+    
     try:
-        # Read audio file content
-        audio_content = await audio.read()
-        audio_data = BytesIO(audio_content)
+        # Retried uploads of the same recording reuse the earlier result.
+        # Cache access never awaits, so it is atomic on the event loop.
+        cache_key = (await run_in_threadpool(hash_audio, audio.file), expected_phrase)
+        cached_response = transcription_cache.get(cache_key)
+        if cached_response is not None:
+            transcription_cache.move_to_end(cache_key)
+            return ORJSONResponse(content=cached_response)
         
         # Transcribe using ElevenLabs
         # Using scribe_v1 model which supports Portuguese
-        transcription = elevenlabs.speech_to_text.convert(
-            file=audio_data,
+        # The SDK call is blocking, so run it off the event loop
+        transcription = await run_in_threadpool(
+            request.app.state.elevenlabs.speech_to_text.convert,
+            # Stream the spooled upload without copying it, labelled with its real format
+            file=(audio.filename, audio.file, audio.content_type),
             model_id="scribe_v1",  # Using scribe_v1 for Portuguese support
             tag_audio_events=False,
             language_code="por",  # Portuguese language code
@@ -194,16 +362,22 @@ async def transcribe_audio(
         # Calculate overall score
         correct_count = sum(1 for eval in word_evaluations if eval.correct)
         total_count = len(word_evaluations)
-        overall_score = (correct_count / total_count * 100) if total_count > 0 else 0
+        overall_score = (correct_count / total_count * 100) if total_count > 0 else 0.0
         all_correct = correct_count == total_count
         
-        return TranscriptionResponse(
+        response = TranscriptionResponse.model_construct(
             transcribed_text=transcribed_text,
             expected_phrase=expected_phrase,
             word_evaluations=word_evaluations,
             overall_score=round(overall_score, 1),
             all_correct=all_correct
         )
+        # Built from trusted values above, so skip FastAPI's response re-validation
+        content = response.model_dump()
+        transcription_cache[cache_key] = content
+        if len(transcription_cache) > TRANSCRIPTION_CACHE_SIZE:
+            transcription_cache.popitem(last=False)
+        return ORJSONResponse(content=content)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
@@ -211,4 +385,11 @@ async def transcribe_audio(
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Multiple workers need the app as an import string
+    uvicorn.run(
+        "main:app",
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        host="0.0.0.0",
+        port=8000,
+        workers=os.cpu_count() or 2,
+    )
@@ -3,62 +3,71 @@ Test script for SpeakWell backend API.
 Tests the health endpoint, phrases endpoint, and transcription endpoint.
 """
 
-import requests
+import asyncio
 import sys
 
+import httpx
+
 API_BASE_URL = "http://localhost:8000"
 
 
-def test_health_endpoint():
+async def test_health_endpoint(client: httpx.AsyncClient):
     """Test the root health check endpoint."""
-    print("\n🧪 Testing health endpoint...")
+    # Tests run concurrently, so collect the report and print it in one go
+    report = ["\n🧪 Testing health endpoint..."]
     try:
-        response = requests.get(f"{API_BASE_URL}/")
+        response = await client.get("/")
         if response.status_code == 200:
             data = response.json()
-            print(f"  ✅ Health check passed: {data}")
+            report.append(f"  ✅ Health check passed: {data}")
             return True
         else:
-            print(f"  ❌ Health check failed with status {response.status_code}")
+            report.append(f"  ❌ Health check failed with status {response.status_code}")
             return False
     except Exception as e:
-        print(f"  ❌ Health check failed: {e}")
+        report.append(f"  ❌ Health check failed: {e}")
         return False
+    finally:
+        print("\n".join(report))
 
 
-def test_get_phrases():
+async def test_get_phrases(client: httpx.AsyncClient):
     """Test the phrases endpoint."""
-    print("\n🧪 Testing phrases endpoint...")
+    report = ["\n🧪 Testing phrases endpoint..."]
     try:
-        response = requests.get(f"{API_BASE_URL}/phrases")
+        response = await client.get("/phrases")
         if response.status_code == 200:
             phrases = response.json()
-            print(f"  ✅ Got {len(phrases)} phrases")
-            print(f"  📋 First phrase: {phrases[0]}")
+            report.append(f"  ✅ Got {len(phrases)} phrases")
+            report.append(f"  📋 First phrase: {phrases[0]}")
             return True
         else:
-            print(f"  ❌ Failed with status {response.status_code}")
+            report.append(f"  ❌ Failed with status {response.status_code}")
             return False
     except Exception as e:
-        print(f"  ❌ Failed: {e}")
+        report.append(f"  ❌ Failed: {e}")
         return False
+    finally:
+        print("\n".join(report))
 
 
-def test_get_single_phrase():
+async def test_get_single_phrase(client: httpx.AsyncClient):
     """Test getting a single phrase by ID."""
-    print("\n🧪 Testing single phrase endpoint...")
+    report = ["\n🧪 Testing single phrase endpoint..."]
     try:
-        response = requests.get(f"{API_BASE_URL}/phrases/1")
+        response = await client.get("/phrases/1")
         if response.status_code == 200:
             phrase = response.json()
-            print(f"  ✅ Got phrase: {phrase}")
+            report.append(f"  ✅ Got phrase: {phrase}")
             return True
         else:
-            print(f"  ❌ Failed with status {response.status_code}")
+            report.append(f"  ❌ Failed with status {response.status_code}")
             return False
     except Exception as e:
-        print(f"  ❌ Failed: {e}")
+        report.append(f"  ❌ Failed: {e}")
         return False
+    finally:
+        print("\n".join(report))
 
 
 def test_transcribe_endpoint():
@@ -71,7 +80,7 @@ def test_transcribe_endpoint():
     return True
 
 
-def test_transcribe_with_audio(audio_path: str):
+async def test_transcribe_with_audio(client: httpx.AsyncClient, audio_path: str):
     """Test the transcription endpoint with an actual audio file."""
     print(f"\n🧪 Testing transcription with audio file: {audio_path}")
     try:
@@ -79,8 +88,8 @@ def test_transcribe_with_audio(audio_path: str):
             files = {"audio": (audio_path, audio_file, "audio/mpeg")}
             data = {"expected_phrase": "Bom dia"}
             
-            response = requests.post(
-                f"{API_BASE_URL}/transcribe",
+            response = await client.post(
+                "/transcribe",
                 files=files,
                 data=data
             )
@@ -109,6 +118,31 @@ def test_transcribe_with_audio(audio_path: str):
         return False
 
 
+async def run_tests():
+    """Run the endpoint tests against one shared client."""
+    async with httpx.AsyncClient(base_url=API_BASE_URL) as client:
+        # The GET endpoints are independent, so run them concurrently
+        health, phrases, single_phrase = await asyncio.gather(
+            test_health_endpoint(client),
+            test_get_phrases(client),
+            test_get_single_phrase(client),
+        )
+        results = [
+            ("Health Endpoint", health),
+            ("Get All Phrases", phrases),
+            ("Get Single Phrase", single_phrase),
+        ]
+        
+        # Check for audio file test
+        if "--with-audio" in sys.argv:
+            audio_path = sys.argv[sys.argv.index("--with-audio") + 1] if len(sys.argv) > sys.argv.index("--with-audio") + 1 else "sample.mp3"
+            results.append(("Transcription with Audio", await test_transcribe_with_audio(client, audio_path)))
+        else:
+            results.append(("Transcription Endpoint", test_transcribe_endpoint()))
+    
+    return results
+
+
 def main():
     """Run all tests."""
     print("=" * 50)
@@ -117,26 +151,14 @@ def main():
     
     # Check if backend is running
     try:
-        requests.get(f"{API_BASE_URL}/", timeout=2)
-    except requests.exceptions.ConnectionError:
+        httpx.get(f"{API_BASE_URL}/", timeout=2)
+    except httpx.TransportError:
         print("\n❌ Backend is not running!")
         print("   Please start the backend first with:")
         print("   cd backend && source ../.venv/bin/activate && uvicorn main:app --reload")
         sys.exit(1)
     
-    results = []
-    
-    # Run tests
-    results.append(("Health Endpoint", test_health_endpoint()))
-    results.append(("Get All Phrases", test_get_phrases()))
-    results.append(("Get Single Phrase", test_get_single_phrase()))
-    
-    # Check for audio file test
-    if "--with-audio" in sys.argv:
-        audio_path = sys.argv[sys.argv.index("--with-audio") + 1] if len(sys.argv) > sys.argv.index("--with-audio") + 1 else "sample.mp3"
-        results.append(("Transcription with Audio", test_transcribe_with_audio(audio_path)))
-    else:
-        results.append(("Transcription Endpoint", test_transcribe_endpoint()))
+    results = asyncio.run(run_tests())
     
     # Print summary
     print("\n" + "=" * 50)